@@ -2,7 +2,6 @@
 
 import re
 import subprocess
-from pynput.mouse import Controller, Listener
 import json
 import os
 from time import sleep
@@ -10,24 +9,75 @@ import signal
 import sys
 import atexit
 import time
-
-
-global sleep_duration
-sleep_duration = 0.01
-
-global do_print
-do_print = True
-# Initialize mouse controller
-mouse_controller = Controller()
+import glob
+import hashlib
+import functools
+import struct
+import select
+import operator
+import fcntl
+
+try:
+    import orjson
+
+    def _json_dumps(obj, pretty=True):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+
+    _json_loads = orjson.loads
+except ImportError:
+
+    def _json_dumps(obj, pretty=True):
+        if pretty:
+            return json.dumps(obj, indent=2).encode()
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    _json_loads = json.loads
+
+try:
+    from Xlib import X, display as xlib_display
+    from Xlib.ext import ge, randr, xinput
+except ImportError:
+    xlib_display = None
+
+
+# The live position readout is only useful on a terminal, not in the journal
+_DO_PRINT = sys.stdout.isatty()
+# Refresh the position readout at most 30 times per second
+_PRINT_INTERVAL = 1 / 30
+
+_MONITOR_RE = re.compile(
+    r"^(\S+) connected(?P<primary> primary)? (\d+)x(\d+)\+(\d+)\+(\d+)(?: \(.*?\))? (\d+)mm x (\d+)mm"
+)
+_MONITOR_FIELDS = ("width", "height", "x_offset", "y_offset", "width_mm", "height_mm")
+# y_offset is left out: it may legitimately differ by the configured mouse_height
+_CONFIG_CHECK_FIELDS = ("width", "height", "x_offset", "width_mm", "height_mm")
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_PID_FILE = "/tmp/monitor_manager.pid"
+_CONFIG_FILE = os.path.join(_SCRIPT_DIR, "config.json")
+_MONITOR_CACHE_FILE = os.path.expanduser(
+    "~/.cache/monitor-mouse-mapper/xrandr.json"
+)
+# Without DRM connector states to compare, trust the cache only this long
+_MONITOR_CACHE_TTL = 30
 
 
 class MonitorManager:
     def __init__(self):
-        self.pid_file = "/tmp/monitor_manager.pid"
+        self.pid_file = _PID_FILE
+        self.script_dir = _SCRIPT_DIR
+        self.config_file = _CONFIG_FILE
+        self.xrandr_output = None
+        self.listener = None
+        self.mouse_controller = None
+        self.x_display = None
+        self.prompting = False
+        self.pid_fd = None
+        self.config_dirty = False
+        self.start_monitor_query()
         self.register_signal_handlers()
         self.startup_pid_check()
-        self.available_monitors = self.fetch_available_monitors()
         self.config = self.read_config()
+        atexit.register(self.flush_config)
         if self.is_config_valid():
             print("Using existing configuration.")
             self.apply_config()
@@ -39,91 +89,360 @@ class MonitorManager:
     def register_signal_handlers(self):
         signal.signal(signal.SIGTERM, self.signal_handler)
         signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGUSR1, self.monitor_cache_signal_handler)
 
     def signal_handler(self, signum, frame):
+        self.flush_config()
+        self.close_x_display()
         self.cleanup_pid_file()
         sys.exit(0)
 
+    def monitor_cache_signal_handler(self, signum, frame):
+        self.invalidate_monitor_cache()
+        print("Monitor cache cleared.")
+
     def cleanup_pid_file(self):
-        if os.path.exists(self.pid_file):
-            os.remove(self.pid_file)
+        # Truncate rather than unlink, so every instance locks the same inode
+        if self.pid_fd is not None:
+            os.ftruncate(self.pid_fd, 0)
         print("Cleaned up PID file and exiting.")
 
     def startup_pid_check(self):
-        if os.path.exists(self.pid_file):
-            with open(self.pid_file, "r") as f:
-                old_pid = int(f.read())
-            try:
-                os.kill(old_pid, 0)  # Check if process is running
-                print(
-                    f"An instance of the script is already running with PID {old_pid}. Stopping it."
-                )
-                os.kill(old_pid, signal.SIGTERM)  # Terminate the old process
-                sleep(1)  # Give it some time to terminate
-                # Since there was a running instance, we exit the new instance after killing the old one
+        # The lock is held for the life of the process, so it can't go stale
+        fd = os.open(self.pid_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            old_pid = int(os.read(fd, 32) or 0)
+            if not old_pid:
+                # The holder hasn't written its PID yet, or is already exiting
                 print(
-                    "Terminated the old instance. Exiting the new instance to prevent duplicates."
+                    "Another instance holds the PID file. Exiting the new instance to prevent duplicates."
                 )
                 exit()
-            except OSError:
-                print("No running instance found. Starting a new one.")
-        else:
-            print("No existing PID file found. Starting a new instance.")
+            print(
+                f"An instance of the script is already running with PID {old_pid}. Stopping it."
+            )
+            try:
+                os.kill(old_pid, signal.SIGTERM)  # Terminate the old process
+                if not self.wait_for_exit(old_pid):
+                    print(f"PID {old_pid} ignored SIGTERM. Killing it.")
+                    os.kill(old_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass  # It exited on its own in the meantime
+            # Since there was a running instance, we exit the new instance after killing the old one
+            print(
+                "Terminated the old instance. Exiting the new instance to prevent duplicates."
+            )
+            exit()
 
-        with open(self.pid_file, "w") as f:
-            f.write(str(os.getpid()))
+        self.pid_fd = fd
+        print("No running instance found. Starting a new one.")
+        os.ftruncate(self.pid_fd, 0)
+        os.write(self.pid_fd, str(os.getpid()).encode())
+
+    def wait_for_exit(self, pid, timeout=1.0, interval=0.02):
+        """Poll until pid is gone or timeout expires."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except OSError:
+                return True
+            sleep(interval)
+        return False
 
     def set_mousespeed(self):
-        if self.config.get("mousespeed_factor") != "1.0":
-            print(
-                f"Setting mousespeed factor to {self.config.get('mousespeed_factor')}"
+        factor = str(self.config.get("mousespeed_factor"))
+        if float(factor) != 1.0:
+            mouse_id = self.config.get("mouse_id")
+            if mouse_id is None:
+                print("No mouse_id in config. Skipping mousespeed factor.")
+                return
+            matrix_property = self.config.get(
+                "coordinate_transformation_matrix_id", "Coordinate Transformation Matrix"
             )
-            subprocess.run(
-                [
-                    "xinput",
-                    "--set-prop",
-                    self.config.get("mouse_id"),
-                    self.config.get("coordinate_transformation_matrix_id"),
-                    self.config.get("mousespeed_factor"),
-                    "0",
-                    "0",
-                    "0",
-                    self.config.get("mousespeed_factor"),
-                    "0",
-                    "0",
-                    "0",
-                    "1",
-                ]
+            print(f"Setting mousespeed factor to {factor}")
+            if self.set_mousespeed_xinput(mouse_id, matrix_property, float(factor)):
+                return
+            try:
+                subprocess.run(
+                    [
+                        "xinput",
+                        "--set-prop",
+                        str(mouse_id),
+                        str(matrix_property),
+                        factor,
+                        "0",
+                        "0",
+                        "0",
+                        factor,
+                        "0",
+                        "0",
+                        "0",
+                        "1",
+                    ],
+                    check=True,
+                )
+            except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                print(f"Error setting mousespeed factor: {e}")
+
+    def get_x_display(self):
+        """Return the shared python-xlib connection, or None if it can't be opened."""
+        if self.x_display is None and xlib_display is not None:
+            try:
+                self.x_display = xlib_display.Display()
+            except Exception as e:
+                print(f"Could not connect to X through python-xlib. Exception: {e}")
+        return self.x_display
+
+    def close_x_display(self):
+        if self.x_display is not None:
+            self.x_display.close()
+            self.x_display = None
+
+    def set_mousespeed_xinput(self, mouse_id, matrix_property, factor):
+        """Write the transformation matrix over XInput2; False if that is not possible."""
+        x_display = self.get_x_display()
+        if x_display is None:
+            return False
+        try:
+            device_id = self.find_pointer_device(x_display, mouse_id)
+            if str(matrix_property).isdigit():
+                property_atom = int(matrix_property)
+            else:
+                property_atom = x_display.intern_atom(matrix_property)
+            float_atom = x_display.intern_atom("FLOAT")
+            matrix = struct.pack("=9f", factor, 0, 0, 0, factor, 0, 0, 0, 1)
+            # Rewriting an unchanged matrix still notifies every client listening
+            current = x_display.xinput_get_device_property(
+                device_id, property_atom, float_atom, 0, 9
+            ).value
+            if current and current[0] == 32:
+                values = current[1]
+                if struct.pack(f"={len(values)}I", *values) == matrix:
+                    print("Mousespeed factor is already set.")
+                    return True
+            x_display.xinput_change_device_property(
+                device_id,
+                property_atom,
+                float_atom,
+                X.PropModeReplace,
+                (32, matrix),
             )
+            x_display.sync()
+            return True
+        except Exception as e:
+            print(f"Could not set mousespeed through XInput2. Exception: {e}")
+            return False
 
-    def fetch_available_monitors(self):
+    def find_pointer_device(self, x_display, mouse_id):
+        """Resolve an xinput device id or `pointer:<name>` to a numeric device id."""
+        if str(mouse_id).isdigit():
+            return int(mouse_id)
+        name = str(mouse_id).removeprefix("pointer:")
+        for device in x_display.xinput_query_device(xinput.AllDevices).devices:
+            if device.name == name and device.use == xinput.SlavePointer:
+                return device.deviceid
+        raise LookupError(f"No pointer device named {name!r}")
+
+    def compute_monitor_cache_key(self):
+        """Hash $DISPLAY and each DRM connector's status and EDID, or None."""
+        connectors = sorted(glob.glob("/sys/class/drm/card*-*/"))
+        if not connectors:
+            return None
+        digest = hashlib.blake2b(
+            os.environ.get("DISPLAY", "").encode(), digest_size=8
+        )
         try:
-            command_output = subprocess.check_output(["xrandr", "--query"], text=True)
-            monitor_info = []
-            pattern = r"(\S+) connected(?: primary)? (\d+)x(\d+)\+(\d+)\+(\d+)(?: \(.*?\))? (\d+)mm x (\d+)mm"
-            for line in command_output.splitlines():
-                match = re.search(pattern, line)
-                if match:
-                    name, width, height, x_offset, y_offset, width_mm, height_mm = (
-                        match.groups()
-                    )
-                    monitor_info.append(
+            for connector in connectors:
+                # The EDID changes when another monitor is plugged into the same port
+                for name in ("status", "edid"):
+                    with open(os.path.join(connector, name), "rb") as f:
+                        digest.update(connector.encode() + f.read())
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def read_monitor_cache(self):
+        try:
+            with open(_MONITOR_CACHE_FILE, "rb") as f:
+                cached = _json_loads(f.read())
+            if cached["hash"] == self.monitor_cache_key and (
+                self.monitor_cache_key is not None
+                or time.time() - cached["timestamp"] < _MONITOR_CACHE_TTL
+            ):
+                return cached["monitors"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def start_monitor_query(self):
+        """Load the monitor cache before anything else talks to the X server."""
+        self.monitor_cache_key = self.compute_monitor_cache_key()
+        self.cached_monitors = self.read_monitor_cache()
+        self.live_monitors = None
+
+    def connect_mouse_controller(self):
+        """Create the pynput controller once; every later mapping reuses it."""
+        if self.mouse_controller is None:
+            from pynput.mouse import Controller
+
+            self.mouse_controller = Controller()
+
+    @functools.cached_property
+    def available_monitors(self):
+        return self.load_available_monitors()
+
+    def load_available_monitors(self):
+        """Reuse the cached monitor list while it is known to be current."""
+        if self.cached_monitors is not None:
+            print("Using cached monitor list.")
+            return self.cached_monitors
+
+        monitor_info = self.live_monitors = self.fetch_available_monitors()
+        try:
+            os.makedirs(os.path.dirname(_MONITOR_CACHE_FILE), exist_ok=True)
+            with open(_MONITOR_CACHE_FILE, "wb") as f:
+                f.write(
+                    _json_dumps(
                         {
-                            "name": name,
-                            "width": int(width),
-                            "height": int(height),
-                            "x_offset": int(x_offset),
-                            "y_offset": int(y_offset),
-                            "width_mm": int(width_mm),
-                            "height_mm": int(height_mm),
-                            "primary": "primary" in line,
-                        }
+                            "hash": self.monitor_cache_key,
+                            "timestamp": time.time(),
+                            "monitors": monitor_info,
+                        },
+                        pretty=False,
                     )
+                )
+        except OSError as e:
+            print(f"Could not write monitor cache: {e}")
+        return monitor_info
+
+    def invalidate_monitor_cache(self):
+        self.xrandr_output = None
+        self.live_monitors = None
+        if os.path.exists(_MONITOR_CACHE_FILE):
+            os.remove(_MONITOR_CACHE_FILE)
+
+    def query_xrandr(self):
+        """Return `xrandr --query` output, running xrandr once per layout."""
+        if self.xrandr_output is None:
+            self.xrandr_output = subprocess.check_output(
+                ["xrandr", "--query", "--current", "--nograb"], text=True
+            )
+        return self.xrandr_output
+
+    def fetch_monitors_xlib(self):
+        """Read the active outputs straight from RandR, or None if python-xlib can't."""
+        x_display = self.get_x_display()
+        if x_display is None:
+            return None
+        try:
+            if not x_display.has_extension("RANDR"):
+                return None
+            root = x_display.screen().root
+            resources = root.xrandr_get_screen_resources_current()
+            primary_output = root.xrandr_get_output_primary().output
+            monitor_info = []
+            for output in resources.outputs:
+                output_info = x_display.xrandr_get_output_info(
+                    output, resources.config_timestamp
+                )
+                # 0 is RR_Connected; connected outputs without a CRTC are off
+                if output_info.connection != 0 or not output_info.crtc:
+                    continue
+                crtc_info = x_display.xrandr_get_crtc_info(
+                    output_info.crtc, resources.config_timestamp
+                )
+                width_mm, height_mm = output_info.mm_width, output_info.mm_height
+                # Match xrandr, which reports mm in the rotated orientation
+                if crtc_info.rotation & (randr.Rotate_90 | randr.Rotate_270):
+                    width_mm, height_mm = height_mm, width_mm
+                monitor_info.append(
+                    {
+                        "name": output_info.name,
+                        "width": crtc_info.width,
+                        "height": crtc_info.height,
+                        "x_offset": crtc_info.x,
+                        "y_offset": crtc_info.y,
+                        "width_mm": width_mm,
+                        "height_mm": height_mm,
+                        "primary": output == primary_output,
+                    }
+                )
+            return monitor_info
+        except Exception as e:
+            print(f"Could not query RandR through python-xlib. Exception: {e}")
+            return None
+
+    def fetch_available_monitors(self):
+        try:
+            monitor_info = self.fetch_monitors_xlib()
+            if monitor_info is not None:
+                return monitor_info
+            process = subprocess.run(
+                ["xrandr", "--listmonitors", "--current", "--nograb"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            # RandR < 1.5 servers have no monitor list
+            monitor_info = (
+                self.parse_listmonitors_output(process.stdout)
+                if process.returncode == 0
+                else None
+            )
+            if monitor_info is None:
+                monitor_info = self.parse_query_output(self.query_xrandr())
             return monitor_info
         except Exception as e:
             print(f"Error: Could not fetch available monitors. Exception: {e}")
             exit(1)
 
+    def parse_listmonitors_output(self, command_output):
+        """Parse lines like ` 0: +*DP-1 1920/527x1080/296+0+0  DP-1`, or return None."""
+        monitor_info = []
+        for line in command_output.splitlines()[1:]:
+            parts = line.split()
+            if len(parts) != 4:
+                return None
+            _, flags_name, geometry, name = parts
+            try:
+                size, x_offset, y_offset = geometry.split("+")
+                width_part, height_part = size.split("x")
+                width, width_mm = width_part.split("/")
+                height, height_mm = height_part.split("/")
+                fields = (width, height, x_offset, y_offset, width_mm, height_mm)
+                monitor_info.append(
+                    {
+                        "name": name,
+                        **dict(zip(_MONITOR_FIELDS, map(int, fields))),
+                        "primary": "*" in flags_name,
+                    }
+                )
+            except ValueError:
+                return None
+        return monitor_info
+
+    def parse_query_output(self, command_output):
+        monitor_info = []
+        for line in command_output.splitlines():
+            # Most lines are mode listings; reject them before running the regex
+            if " connected " not in line:
+                continue
+            match = _MONITOR_RE.match(line)
+            if match is None:
+                continue
+            name, primary, *fields = match.groups()
+            monitor_info.append(
+                {
+                    "name": name,
+                    **dict(zip(_MONITOR_FIELDS, map(int, fields))),
+                    "primary": primary is not None,
+                }
+            )
+        return monitor_info
+
     def setup_monitors(self):
         print("Available Monitors:")
         for i, monitor in enumerate(self.available_monitors):
@@ -180,29 +499,45 @@ class MonitorManager:
     def set_additional_properties(self):
         self.bottom_width_cm = self.bottom_monitor["width_mm"] / 10
         self.top_width_cm = self.top_monitor["width_mm"] / 10
+        # The bottom monitor is centred below the top one, so both share a midline
+        top_mid = self.top_width // 2
+        bottom_mid = top_mid
+        top_dpi = self.top_width / self.top_width_cm
+        bottom_dpi = self.bottom_width / self.bottom_width_cm
+        scale_down = bottom_dpi / top_dpi
+        scale_up = top_dpi / bottom_dpi
+        # Each jump maps x through new_x = a * old_x + b
+        self.jump_down = (scale_down, bottom_mid - scale_down * top_mid)
+        self.jump_up = (scale_up, top_mid - scale_up * bottom_mid)
 
     def get_and_set_monitor_info(self):
-        (
-            self.bottom_width,
-            self.bottom_height,
-            self.bottom_x_offset,
-            self.bottom_y_offset,
-        ) = self.get_monitor_info(self.bottom_monitor["name"])
-        self.top_width, self.top_height, self.top_x_offset, self.top_y_offset = (
-            self.get_monitor_info(self.top_monitor["name"])
-        )
+        geometries = self.get_monitor_geometries()
+        try:
+            (
+                self.bottom_width,
+                self.bottom_height,
+                self.bottom_x_offset,
+                self.bottom_y_offset,
+            ) = geometries[self.bottom_monitor["name"]]
+            self.top_width, self.top_height, self.top_x_offset, self.top_y_offset = (
+                geometries[self.top_monitor["name"]]
+            )
+        except KeyError as e:
+            print(f"Error: Could not find resolution info for {e}.")
+            exit(1)
 
     def read_config(self):
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        configfile = os.path.join(script_dir, "config.json")
-        if os.path.exists(configfile):
-            try:
-                with open(configfile, "r") as f:
-                    config = json.load(f)
-                print(f"Config read from {configfile}: {config}")
-                return config
-            except json.JSONDecodeError:
-                print("Error reading config file. Creating a new one.")
+        self.config_on_disk = None
+        try:
+            with open(self.config_file, "rb") as f:
+                self.config_on_disk = f.read()
+            config = _json_loads(self.config_on_disk)
+            print(f"Config read from {self.config_file}: {config}")
+            return config
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            print("Error reading config file. Creating a new one.")
         return None
 
     def create_config(self):
@@ -221,25 +556,41 @@ class MonitorManager:
         self.mousespeed_factor = float(self.config["mousespeed_factor"])
         self.mouse_height = int(self.config["mouse_height"])
 
-    def get_monitor_info(self, monitor_name):
-        """Fetch the monitor details using xrandr and return them."""
+    def get_monitor_geometries(self):
+        """Return {name: (width, height, x_offset, y_offset)} for all active outputs."""
         try:
-            command_output = subprocess.check_output(["xrandr", "--query"], text=True)
-            monitor_line = [
-                line
-                for line in command_output.splitlines()
-                if monitor_name in line and "connected" in line
-            ][0]
-            resolution_info = re.search(
-                r"(\d+)x(\d+)\+(\d+)\+(\d+)", monitor_line
-            ).groups()
-            return tuple(map(int, resolution_info))
+            # A list fetched during this run is as current as a second query
+            monitors = self.live_monitors or self.fetch_monitors_xlib()
+            if monitors is not None:
+                return {
+                    m["name"]: tuple(m[key] for key in _MONITOR_FIELDS[:4])
+                    for m in monitors
+                }
+            return self.parse_query_geometries(self.query_xrandr())
         except Exception as e:
-            print(
-                f"Error: Could not find resolution info for {monitor_name}. Exception: {e}"
-            )
+            print(f"Error: Could not fetch monitor geometry. Exception: {e}")
             exit(1)
 
+    def parse_query_geometries(self, command_output):
+        """Read the `WxH+X+Y` token from each connected, active output line."""
+        geometries = {}
+        for line in command_output.splitlines():
+            if " connected " not in line:
+                continue
+            parts = line.split(maxsplit=4)
+            if len(parts) < 3 or parts[1] != "connected":
+                continue
+            geometry = parts[2]
+            if geometry == "primary" and len(parts) > 3:
+                geometry = parts[3]
+            try:
+                geometries[parts[0]] = tuple(
+                    map(int, geometry.replace("+", "x").split("x"))
+                )
+            except ValueError:
+                continue  # Connected but disabled, e.g. "HDMI-1 connected (normal ..."
+        return geometries
+
     def set_monitor_position(self):
         """Set the monitor position using xrandr."""
         new_bottom_x_offset = max(
@@ -256,16 +607,23 @@ class MonitorManager:
                 f"Setting {self.bottom_monitor['name']} position to {new_bottom_x_offset}x{new_bottom_y_offset}"
             )
             try:
-                subprocess.run(
-                    [
-                        "xrandr",
-                        "--output",
-                        self.bottom_monitor["name"],
-                        "--pos",
-                        f"{new_bottom_x_offset}x{new_bottom_y_offset}",
-                    ],
-                    check=True,
-                )
+                if not self.set_monitor_position_xlib(
+                    self.bottom_monitor["name"],
+                    new_bottom_x_offset,
+                    new_bottom_y_offset,
+                ):
+                    subprocess.run(
+                        [
+                            "xrandr",
+                            "--output",
+                            self.bottom_monitor["name"],
+                            "--pos",
+                            f"{new_bottom_x_offset}x{new_bottom_y_offset}",
+                        ],
+                        check=True,
+                    )
+                # The cached monitor list no longer matches the layout
+                self.invalidate_monitor_cache()
                 # Update the config with the new position
                 for monitor in self.config["monitors"]:
                     if monitor["name"] == self.bottom_monitor["name"]:
@@ -273,7 +631,8 @@ class MonitorManager:
                         monitor["y_offset"] = (
                             new_bottom_y_offset - self.mouse_height
                         )  # Store the original y_offset
-                self.save_config()  # Save the updated config
+                # Written at exit, or by the explicit save when setup is confirmed
+                self.config_dirty = True
             except subprocess.CalledProcessError as e:
                 print(f"Error setting monitor position: {e}")
                 print("Skipping monitor position adjustment.")
@@ -282,94 +641,226 @@ class MonitorManager:
                 f"Monitor {self.bottom_monitor['name']} is already in the correct position."
             )
 
-    def supervise_mouse_position(self, x, y):
-        """Print the mouse position and handle jumps when crossing monitor boundaries."""
-        if do_print:
-            print(f"\r X: {x}, Y: {y}", end="   ", flush=True)
+    def set_monitor_position_xlib(self, name, x, y):
+        """Move an output's CRTC over RandR; False to let the xrandr binary do it."""
+        x_display = self.get_x_display()
+        if x_display is None:
+            return False
+        try:
+            if not x_display.has_extension("RANDR"):
+                return False
+            screen = x_display.screen()
+            root = screen.root
+            resources = root.xrandr_get_screen_resources_current()
+            target = None
+            screen_width = screen_height = 0
+            for output in resources.outputs:
+                output_info = x_display.xrandr_get_output_info(
+                    output, resources.config_timestamp
+                )
+                if not output_info.crtc:
+                    continue
+                crtc_info = x_display.xrandr_get_crtc_info(
+                    output_info.crtc, resources.config_timestamp
+                )
+                if output_info.name == name:
+                    target = (output_info.crtc, crtc_info)
+                    right, bottom = x + crtc_info.width, y + crtc_info.height
+                else:
+                    right = crtc_info.x + crtc_info.width
+                    bottom = crtc_info.y + crtc_info.height
+                screen_width = max(screen_width, right)
+                screen_height = max(screen_height, bottom)
+            if target is None:
+                return False
 
-        if (
-            abs(y - self.top_height) >= int(self.config["safety_region"])
-            or x >= self.top_width
-        ):
-            return
+            # The connection is long-lived, so read the size from the root window
+            # rather than the setup data, which doesn't follow later resizes
+            current = root.get_geometry()
+            # Only grow the screen here; shrinking needs the CRTC juggling xrandr does
+            if screen_width < current.width or screen_height < current.height:
+                return False
+            if screen_width != current.width or screen_height != current.height:
+                root.xrandr_set_screen_size(
+                    screen_width,
+                    screen_height,
+                    screen.width_in_mms * screen_width // screen.width_in_pixels,
+                    screen.height_in_mms * screen_height // screen.height_in_pixels,
+                )
 
-        if self.do_jump and self.prev_y is not None:
-            if (y >= self.top_height and self.prev_y < self.top_height) or (
-                y < self.top_height and self.prev_y >= self.top_height
-            ):
-                direction = "down" if y >= self.top_height else "up"
-                new_x = self.handle_jump(x, direction)
-                self.mouse_controller.position = (new_x, y)
-                print(f"jumped {direction}".upper())
+            crtc, crtc_info = target
+            reply = x_display.xrandr_set_crtc_config(
+                crtc,
+                resources.config_timestamp,
+                x,
+                y,
+                crtc_info.mode,
+                crtc_info.rotation,
+                crtc_info.outputs,
+            )
+            return reply.status == 0  # RRSetConfigSuccess
+        except Exception as e:
+            print(f"Could not move the monitor through python-xlib. Exception: {e}")
+            return False
 
-        self.prev_y = y
+    def supervise_mouse_position(self, x, y):
+        """Print the mouse position and handle jumps when crossing monitor boundaries."""
+        if _DO_PRINT and not self.prompting:
+            now = time.monotonic()
+            if now - self.last_print_time >= _PRINT_INTERVAL:
+                self.last_print_time = now
+                print(f"\r X: {x}, Y: {y}", end="   ", flush=True)
+
+        # Track the pointer by its distance from the edge between the monitors
+        dy = y - self.top_height
+        prev_dy = self.prev_dy
+        self.prev_dy = dy
+        # Most events stay on one side of the edge: the sign bits of dy and
+        # prev_dy differ exactly when they straddle it, so test that first
+        if prev_dy is None or (dy ^ prev_dy) >= 0:
+            return
+        sr = self.safety_region
+        if not -sr < dy < sr or x >= self.top_width:
+            return
 
-    def handle_jump(self, old_x, direction):
-        top_dpi = self.top_width / self.top_width_cm
-        bottom_dpi = self.bottom_width / self.bottom_width_cm
-        top_mid = self.top_width // 2
-        bottom_x_offset = top_mid - (self.bottom_width // 2)
-        bottom_mid = (self.bottom_width // 2) + bottom_x_offset
-        offset = old_x - (top_mid if direction == "up" else bottom_mid)
-        scaling_factor = (
-            bottom_dpi / top_dpi if direction == "down" else top_dpi / bottom_dpi
-        )
-        new_offset = offset * scaling_factor
-        new_x = (bottom_mid if direction == "down" else top_mid) + new_offset
-        return new_x
+        a, b = self.jump_down if dy >= 0 else self.jump_up
+        self.mouse_controller.position = (a * x + b, y)
+        if _DO_PRINT and not self.prompting:
+            print("JUMPED DOWN" if dy >= 0 else "JUMPED UP")
 
     def setup_and_confirm(self):
         while True:
             self.setup_monitors()
             self.create_config()
-            self.set_additional_properties()
-            self.get_and_set_monitor_info()
-            self.set_monitor_position()
-            self.prev_y = None
-            self.do_jump = True
-            self.mouse_controller = Controller()
-            self.set_mousespeed()
+            self.initialize_mapping()
 
             print("Testing setup for 10 seconds...")
-            start_time = time.time()
-            with Listener(on_move=self.on_move) as listener:
-                while time.time() - start_time < 10:
-                    time.sleep(0.1)
-                    if not listener.running:
-                        break
+            from pynput.mouse import Listener
+
+            listener = Listener(on_move=self.supervise_mouse_position)
+            listener.start()
+            # Raise only the listener thread, not the setup helpers this one spawns
+            self.raise_priority(listener.native_id)
+            listener.join(10)
 
+            # Keep the listener alive, but print nothing over the prompts below
+            self.prompting = True
             confirm = input("Is this setup correct? (Y/N): ").upper()
             if confirm == "Y":
                 print("Setup confirmed. Saving configuration.")
                 self.save_config()
                 self.prompt_service_installation()
+                self.prompting = False
+                # run() carries on with the listener already following the pointer
+                self.listener = listener
                 break
             else:
+                listener.stop()
+                self.prompting = False
                 print("Restarting setup process...")
                 self.config = None  # Reset config to force new setup
-
-    def on_move(self, x, y):
-        self.supervise_mouse_position(x, y)
+                self.config_dirty = False
 
     def save_config(self):
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        configfile = os.path.join(script_dir, "config.json")
-        with open(configfile, "w") as f:
-            json.dump(self.config, f, indent=2)
-        print(f"Configuration saved to {configfile}")
+        data = _json_dumps(self.config)
+        if data == self.config_on_disk:
+            print(f"Configuration in {self.config_file} is already up to date.")
+            self.config_dirty = False
+            return
+        # Write a sibling file and rename it so a crash never leaves partial JSON
+        temp_file = f"{self.config_file}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(data)
+        os.replace(temp_file, self.config_file)
+        self.config_on_disk = data
+        self.config_dirty = False
+        print(f"Configuration saved to {self.config_file}")
+
+    def flush_config(self):
+        """Save config changes that were deferred until exit."""
+        if self.config_dirty:
+            self.save_config()
 
     def get_mouse_position(self):
+        return self.mouse_controller.position
+
+    def raise_priority(self, thread_id=0):
+        """Request real-time scheduling so pointer events are handled promptly."""
+        # Needs CAP_SYS_NICE. On Linux both calls change a single thread (0 is the
+        # calling one), and threads it starts afterwards inherit the setting
         try:
-            output = subprocess.check_output(["xdotool", "getmouselocation"]).decode()
-            x, y = map(int, output.split()[:2])
-            return x, y
-        except Exception as e:
-            print(f"Error getting mouse position: {e}")
-            return 0, 0
+            os.sched_setscheduler(thread_id, os.SCHED_FIFO, os.sched_param(10))
+            return
+        except (AttributeError, OSError):
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, thread_id, -5)
+        except OSError:
+            print("Running at normal priority (no permission to raise it).")
 
     def run(self):
-        with Listener(on_move=self.on_move) as listener:
-            listener.join()
+        if self.listener is None:
+            self.raise_priority()
+            if self.run_xinput_loop():
+                return
+            from pynput.mouse import Listener
+
+            self.listener = Listener(on_move=self.supervise_mouse_position)
+            self.listener.start()
+        self.listener.join()
+
+    def run_xinput_loop(self):
+        """Follow the pointer via XInput2 raw motion events; False if unavailable."""
+        x_display = self.get_x_display()
+        if x_display is None:
+            return False
+        # Nothing else needs X after this, so each fallback closes the connection
+        # rather than leave it idle while the pynput listener runs
+        try:
+            extension = x_display.query_extension("XInputExtension")
+            if not extension.present:
+                print("XInput2 is unavailable, using the pynput listener.")
+                self.close_x_display()
+                return False
+            # python-xlib announces XI 2.0, and a 2.0 client gets no raw events
+            # while another client grabs the pointer (drags, menus, games)
+            version = xinput.XIQueryVersion(
+                display=x_display.display,
+                opcode=extension.major_opcode,
+                major_version=2,
+                minor_version=2,
+            )
+            if (version.major_version, version.minor_version) < (2, 1):
+                print("XInput 2.1 is unavailable, using the pynput listener.")
+                self.close_x_display()
+                return False
+            root = x_display.screen().root
+            root.xinput_select_events(
+                [(xinput.AllMasterDevices, xinput.RawMotionMask)]
+            )
+        except Exception as e:
+            print(f"XInput2 is unavailable, using the pynput listener. Exception: {e}")
+            self.close_x_display()
+            return False
+
+        fd = x_display.fileno()
+        while True:
+            if not x_display.pending_events():
+                select.select([fd], [], [])
+            # Drain everything queued so a burst of motion costs a single check
+            moved = False
+            while x_display.pending_events():
+                event = x_display.next_event()
+                if (
+                    event.type == ge.GenericEventCode
+                    and event.extension == extension.major_opcode
+                    and event.evtype == xinput.RawMotion
+                ):
+                    moved = True
+            if moved:
+                # Raw events carry device deltas only, so read the resulting position
+                pointer = root.query_pointer()
+                self.supervise_mouse_position(pointer.root_x, pointer.root_y)
 
     def is_config_valid(self):
         if not self.config:
@@ -384,26 +875,22 @@ class MonitorManager:
             return False
 
         mouse_height = int(self.config.get("mouse_height", 0))
+        available_by_name = {m["name"]: m for m in self.available_monitors}
+        fixed_fields = operator.itemgetter(*_CONFIG_CHECK_FIELDS)
 
         for config_monitor in config_monitors:
-            matching_monitor = next(
-                (
-                    m
-                    for m in self.available_monitors
-                    if m["name"] == config_monitor["name"]
-                ),
-                None,
-            )
+            matching_monitor = available_by_name.get(config_monitor["name"])
             if not matching_monitor:
                 print(f"No matching monitor found for {config_monitor['name']}")
                 return False
 
-            for key in ["width", "height", "x_offset", "width_mm", "height_mm"]:
-                if config_monitor[key] != matching_monitor[key]:
-                    print(
-                        f"Mismatch in {key} for {config_monitor['name']}. Config: {config_monitor[key]}, Available: {matching_monitor[key]}"
-                    )
-                    return False
+            if fixed_fields(config_monitor) != fixed_fields(matching_monitor):
+                for key in _CONFIG_CHECK_FIELDS:
+                    if config_monitor[key] != matching_monitor[key]:
+                        print(
+                            f"Mismatch in {key} for {config_monitor['name']}. Config: {config_monitor[key]}, Available: {matching_monitor[key]}"
+                        )
+                        return False
 
             # Special check for y_offset
             if (
@@ -420,25 +907,22 @@ class MonitorManager:
         return True
 
     def apply_config(self):
-        self.bottom_monitor = next(
-            m
-            for m in self.config["monitors"]
-            if m["name"] == self.config["bottom_monitor"]
-        )
-        self.top_monitor = next(
-            m
-            for m in self.config["monitors"]
-            if m["name"] == self.config["top_monitor"]
-        )
+        monitors_by_name = {m["name"]: m for m in self.config["monitors"]}
+        self.bottom_monitor = monitors_by_name[self.config["bottom_monitor"]]
+        self.top_monitor = monitors_by_name[self.config["top_monitor"]]
         self.safety_region = int(self.config["safety_region"])
         self.mousespeed_factor = float(self.config["mousespeed_factor"])
         self.mouse_height = int(self.config["mouse_height"])
-        self.set_additional_properties()
+        self.initialize_mapping()
+
+    def initialize_mapping(self):
+        """Position the monitors and reset the jump state for the current config."""
         self.get_and_set_monitor_info()
+        self.set_additional_properties()
         self.set_monitor_position()
-        self.prev_y = None
-        self.do_jump = True
-        self.mouse_controller = Controller()
+        self.prev_dy = None
+        self.last_print_time = 0.0
+        self.connect_mouse_controller()  # Now rather than on the first jump
         self.set_mousespeed()
 
     def prompt_service_installation(self):
@@ -446,8 +930,7 @@ class MonitorManager:
             "Do you want to install this script as a system service? (Y/N): "
         ).upper()
         if install_service == "Y":
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            install_script = os.path.join(script_dir, "install_service.py")
+            install_script = os.path.join(self.script_dir, "install_service.py")
             subprocess.run(["python3", install_script])
         else:
             print("Skipping service installation. You can run the script manually.")
@@ -41,10 +41,8 @@ WantedBy=graphical.target
         )
         subprocess.run(["sudo", "systemctl", "daemon-reload"], check=True)
         subprocess.run(
-            ["sudo", "systemctl", "enable", "monitor-mouse-mapper.service"], check=True
-        )
-        subprocess.run(
-            ["sudo", "systemctl", "start", "monitor-mouse-mapper.service"], check=True
+            ["sudo", "systemctl", "enable", "--now", "monitor-mouse-mapper.service"],
+            check=True,
         )
 
         print("Monitor Mouse Mapper service has been installed and started.")